@@ -282,16 +282,16 @@ func cmdRun(args []string) int {
 		// Print stdout.
 		stdoutData, _ := os.ReadFile(filepath.Join(j.Dir, "stdout.txt"))
 		if len(stdoutData) > 0 {
-			fmt.Fprint(os.Stdout, string(stdoutData))
+			os.Stdout.Write(stdoutData)
 		}
 
 		// Print changelog + stderr to stderr.
 		changelogData, _ := os.ReadFile(filepath.Join(j.Dir, "changelog.txt"))
 		if len(changelogData) > 0 {
-			fmt.Fprint(os.Stderr, string(changelogData))
+			os.Stderr.Write(changelogData)
 		}
 		if len(stderrData) > 0 {
-			fmt.Fprint(os.Stderr, string(stderrData))
+			os.Stderr.Write(stderrData)
 		}
 	}
 
@@ -10,6 +10,8 @@ import (
 	"path/filepath"
 	"strings"
 	"time"
+
+	"github.com/veschin/GoLeM/internal/exitcode"
 )
 
 // Config holds the parameters needed to invoke the Claude CLI.
@@ -223,21 +225,9 @@ func MapStatus(exitCode int, stderr string) string {
 	case 124:
 		return "timeout"
 	default:
-		if isPermissionError(stderr) {
+		if exitcode.IsPermissionError(stderr) {
 			return "permission_error"
 		}
 		return "failed"
 	}
 }
-
-// isPermissionError reports whether stderr indicates a permission problem.
-func isPermissionError(stderr string) bool {
-	lower := strings.ToLower(stderr)
-	keywords := []string{"permission", "not allowed", "denied", "unauthorized"}
-	for _, kw := range keywords {
-		if strings.Contains(lower, kw) {
-			return true
-		}
-	}
-	return false
-}
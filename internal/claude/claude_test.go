@@ -3,6 +3,7 @@ package claude_test
 import (
 	"encoding/json"
 	"fmt"
+	"io"
 	"os"
 	"path/filepath"
 	"strings"
@@ -12,8 +13,9 @@ import (
 	"github.com/veschin/GoLeM/internal/claude"
 )
 
-// seedDir is the absolute path to the claude-execution seed directory.
-const seedDir = "/home/veschin/work/GoLeM/.ptsd/seeds/claude-execution"
+// seedDir is the path to the claude-execution seed directory, relative to this
+// package (go test runs with the package directory as working directory).
+const seedDir = "../../.ptsd/seeds/claude-execution"
 
 // readSeed reads a file from the seed directory and returns its contents.
 func readSeed(t *testing.T, name string) string {
@@ -841,3 +843,393 @@ func TestBashCommandLongerThan80CharsIsTruncatedInChangelog(t *testing.T) {
 		t.Errorf("command part is %d chars, want ≤ 80; got: %q", len(cmdPart), cmdPart)
 	}
 }
+
+// TestEditCharCountWithEscapedNewString verifies that the EDIT char count is
+// the length of the decoded new_string, not of its escaped JSON form.
+func TestEditCharCountWithEscapedNewString(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{
+  "type": "result",
+  "result": "",
+  "messages": [
+    {
+      "role": "assistant",
+      "content": [
+        {
+          "type": "tool_use",
+          "name": "Edit",
+          "input": {"file_path": "/tmp/a.go", "old_string": "x", "new_string": "a\n\"b\"é"}
+        }
+      ]
+    }
+  ]
+}`
+
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	// "a", "\n", `"b"`, "é" (2 bytes in UTF-8) = 7 bytes.
+	changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+	want := "EDIT /tmp/a.go: 7 chars"
+	if changelog != want {
+		t.Errorf("changelog.txt = %q, want %q", changelog, want)
+	}
+}
+
+// TestRawJSONResultWithEscapesIsDecoded verifies that escape sequences in the
+// ".result" field are decoded before being written to stdout.txt.
+func TestRawJSONResultWithEscapesIsDecoded(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{"type":"result","result":"line one\nsaid \"done\" ✔"}`
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	stdout := readJobFile(t, jobDir, "stdout.txt")
+	want := "line one\nsaid \"done\" ✔"
+	if stdout != want {
+		t.Errorf("stdout.txt = %q, want %q", stdout, want)
+	}
+}
+
+// TestMalformedToolInputSkipsOnlyThatBlock verifies that a tool_use block with
+// an input of an unexpected shape is skipped on its own: stdout.txt and the
+// changelog entries of the other blocks are still written.
+func TestMalformedToolInputSkipsOnlyThatBlock(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{
+  "type": "result",
+  "result": "hello",
+  "messages": [
+    {
+      "role": "assistant",
+      "content": [
+        {"type": "tool_use", "name": "mcp__x", "input": {"command": ["ls", "-la"], "file_path": 7}},
+        {"type": "tool_use", "name": "Bash", "input": {"command": ["rm", "-rf", "/"]}},
+        {"type": "tool_use", "name": "Write", "input": {"file_path": {"path": "/b"}}},
+        {"type": "tool_use", "name": "Edit", "input": "not an object"},
+        {"type": "tool_use", "name": "Bash", "input": {}},
+        {"type": "tool_use", "name": "Write", "input": {"file_path": "/a", "content": "x"}}
+      ]
+    }
+  ]
+}`
+
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	if stdout := readJobFile(t, jobDir, "stdout.txt"); stdout != "hello" {
+		t.Errorf("stdout.txt = %q, want %q", stdout, "hello")
+	}
+
+	changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+	if changelog != "WRITE /a" {
+		t.Errorf("changelog.txt = %q, want %q", changelog, "WRITE /a")
+	}
+}
+
+// TestEditWithNonStringNewStringIsSkipped verifies that an Edit whose
+// new_string (or old_string) is not a string is left out of the changelog
+// without affecting stdout.txt or the other entries.
+func TestEditWithNonStringNewStringIsSkipped(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{
+  "type": "result",
+  "result": "hello",
+  "messages": [
+    {
+      "role": "assistant",
+      "content": [
+        {"type": "tool_use", "name": "Edit", "input": {"file_path": "/x", "old_string": "a", "new_string": 42}},
+        {"type": "tool_use", "name": "Edit", "input": {"file_path": "/y", "old_string": ["a"], "new_string": "b"}},
+        {"type": "tool_use", "name": "Bash", "input": {"command": "mkdir /d", "new_string": 42}},
+        {"type": "tool_use", "name": "Edit", "input": {"file_path": "/z", "old_string": "a", "new_string": "abc"}}
+      ]
+    }
+  ]
+}`
+
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	if stdout := readJobFile(t, jobDir, "stdout.txt"); stdout != "hello" {
+		t.Errorf("stdout.txt = %q, want %q", stdout, "hello")
+	}
+
+	changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+	want := "FS: mkdir /d\nEDIT /z: 3 chars"
+	if changelog != want {
+		t.Errorf("changelog.txt = %q, want %q", changelog, want)
+	}
+}
+
+// TestToolNameWithEscapesIsRecognised verifies that a tool name written with
+// JSON escapes still maps to its tool, and that a non-string name is ignored
+// without affecting the other blocks.
+func TestToolNameWithEscapesIsRecognised(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{
+  "type": "result",
+  "result": "",
+  "messages": [
+    {
+      "role": "assistant",
+      "content": [
+        {"type": "tool_use", "name": 7, "input": {"file_path": "/ignored"}},
+        {"type": "tool_use", "name": "Edi\u0074", "input": {"file_path": "/tmp/a.go", "old_string": "x", "new_string": "abcd"}}
+      ]
+    }
+  ]
+}`
+
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+	want := "EDIT /tmp/a.go: 4 chars"
+	if changelog != want {
+		t.Errorf("changelog.txt = %q, want %q", changelog, want)
+	}
+}
+
+// TestRawJSONWithoutToolUseKeepsResult verifies that a transcript with no
+// tool_use blocks still produces stdout.txt from ".result" and
+// "(no file changes)" in changelog.txt.
+func TestRawJSONWithoutToolUseKeepsResult(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{
+  "type": "result",
+  "result": "The answer is 42.\nNo files were touched.",
+  "messages": [
+    {"role": "user", "content": [{"type": "text", "text": "question"}]},
+    {"role": "assistant", "content": [{"type": "text", "text": "The answer is 42."}]}
+  ]
+}`
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	stdout := readJobFile(t, jobDir, "stdout.txt")
+	if want := "The answer is 42.\nNo files were touched."; stdout != want {
+		t.Errorf("stdout.txt = %q, want %q", stdout, want)
+	}
+	changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+	if changelog != "(no file changes)" {
+		t.Errorf("changelog.txt = %q, want %q", changelog, "(no file changes)")
+	}
+}
+
+// TestRawJSONWithWrongTypedMessagesKeepsResult verifies that a "messages"
+// value of the wrong type is handled the same way whether or not the file
+// contains a "tool_use" literal: stdout.txt keeps ".result" and the changelog
+// reads "(no file changes)".
+func TestRawJSONWithWrongTypedMessagesKeepsResult(t *testing.T) {
+	for _, raw := range []string{
+		`{"type":"result","result":"hello","messages":"oops"}`,
+		`{"type":"result","result":"hello","messages":"oops","note":"tool_use"}`,
+	} {
+		jobDir := t.TempDir()
+		if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+			t.Fatal(err)
+		}
+
+		if err := claude.ParseRawJSON(jobDir); err != nil {
+			t.Fatalf("ParseRawJSON(%s): %v", raw, err)
+		}
+
+		if stdout := readJobFile(t, jobDir, "stdout.txt"); stdout != "hello" {
+			t.Errorf("%s: stdout.txt = %q, want %q", raw, stdout, "hello")
+		}
+		changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+		if changelog != "(no file changes)" {
+			t.Errorf("%s: changelog.txt = %q, want %q", raw, changelog, "(no file changes)")
+		}
+	}
+}
+
+// TestRawJSONTopLevelNotAnObjectIsMalformed verifies that valid JSON whose
+// top-level value is not an object is still reported as malformed: a warning
+// is logged, stdout.txt is empty and the changelog reads "(no file changes)".
+func TestRawJSONTopLevelNotAnObjectIsMalformed(t *testing.T) {
+	for _, raw := range []string{
+		`[{"type":"result","result":"hello"}]`,
+		`"hello"`,
+		`42`,
+	} {
+		jobDir := t.TempDir()
+		if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+			t.Fatal(err)
+		}
+
+		oldStderr := os.Stderr
+		r, w, _ := os.Pipe()
+		os.Stderr = w
+
+		err := claude.ParseRawJSON(jobDir)
+
+		w.Close()
+		os.Stderr = oldStderr
+		stderrData, _ := io.ReadAll(r)
+		r.Close()
+
+		if err != nil {
+			t.Fatalf("ParseRawJSON(%s): %v", raw, err)
+		}
+		if stdout := readJobFile(t, jobDir, "stdout.txt"); stdout != "" {
+			t.Errorf("%s: stdout.txt = %q, want empty string", raw, stdout)
+		}
+		changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+		if changelog != "(no file changes)" {
+			t.Errorf("%s: changelog.txt = %q, want %q", raw, changelog, "(no file changes)")
+		}
+		if !strings.Contains(string(stderrData), "warning: malformed JSON") {
+			t.Errorf("%s: expected malformed JSON warning in stderr, got: %q", raw, stderrData)
+		}
+	}
+}
+
+// --------------------------------------------------------------------------
+// Benchmarks
+// --------------------------------------------------------------------------
+
+// syntheticTranscript builds a raw.json with the given number of rounds, each
+// holding a text reply, a Read, an Edit with sizeable strings, a Bash call and
+// a tool_result carrying file contents, roughly like a long coding session.
+func syntheticTranscript(rounds int) []byte {
+	body := strings.Repeat("func f() {\n\treturn \"x\"\n}\n", 40)
+	var msgs []any
+	for i := 0; i < rounds; i++ {
+		path := fmt.Sprintf("/work/pkg/file%d.go", i)
+		msgs = append(msgs,
+			map[string]any{
+				"role": "assistant",
+				"content": []any{
+					map[string]any{"type": "text", "text": "Looking at " + path},
+					map[string]any{"type": "tool_use", "name": "Read", "input": map[string]any{"file_path": path}},
+					map[string]any{"type": "tool_use", "name": "Edit", "input": map[string]any{
+						"file_path": path, "old_string": body, "new_string": body + "// edited\n",
+					}},
+					map[string]any{"type": "tool_use", "name": "Bash", "input": map[string]any{"command": "go test ./pkg/..."}},
+				},
+			},
+			map[string]any{
+				"role":    "user",
+				"content": []any{map[string]any{"type": "tool_result", "content": body}},
+			},
+		)
+	}
+	data, err := json.Marshal(map[string]any{
+		"type":     "result",
+		"result":   strings.Repeat("Summary of the changes made.\n", 50),
+		"messages": msgs,
+	})
+	if err != nil {
+		panic(err)
+	}
+	return data
+}
+
+// BenchmarkParseRawJSON measures parsing a 500-round transcript into
+// stdout.txt and changelog.txt.
+func BenchmarkParseRawJSON(b *testing.B) {
+	jobDir := b.TempDir()
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), syntheticTranscript(500), 0o644); err != nil {
+		b.Fatal(err)
+	}
+
+	b.ReportAllocs()
+	b.ResetTimer()
+	for i := 0; i < b.N; i++ {
+		if err := claude.ParseRawJSON(jobDir); err != nil {
+			b.Fatalf("ParseRawJSON: %v", err)
+		}
+	}
+}
+
+// TestToolUseTypeWithEscapesIsRecognised verifies that a tool_use block whose
+// type string is written with JSON escapes still reaches the changelog.
+func TestToolUseTypeWithEscapesIsRecognised(t *testing.T) {
+	jobDir := t.TempDir()
+
+	raw := `{"type":"result","result":"hello","messages":[{"role":"assistant","content":[` +
+		`{"type":"tool\u005fuse","name":"Write","input":{"file_path":"/a","content":"x"}}]}]}`
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(raw), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	if err := claude.ParseRawJSON(jobDir); err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+
+	if stdout := readJobFile(t, jobDir, "stdout.txt"); stdout != "hello" {
+		t.Errorf("stdout.txt = %q, want %q", stdout, "hello")
+	}
+	changelog := strings.TrimRight(readJobFile(t, jobDir, "changelog.txt"), "\n")
+	if changelog != "WRITE /a" {
+		t.Errorf("changelog.txt = %q, want %q", changelog, "WRITE /a")
+	}
+}
+
+// TestRawJSONNonStringResultWarnsWithFieldName verifies that a ".result" of
+// the wrong type is reported as malformed and that the warning names the field.
+func TestRawJSONNonStringResultWarnsWithFieldName(t *testing.T) {
+	jobDir := t.TempDir()
+	if err := os.WriteFile(filepath.Join(jobDir, "raw.json"), []byte(`{"type":"result","result":42}`), 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	oldStderr := os.Stderr
+	r, w, _ := os.Pipe()
+	os.Stderr = w
+
+	err := claude.ParseRawJSON(jobDir)
+
+	w.Close()
+	os.Stderr = oldStderr
+	stderrData, _ := io.ReadAll(r)
+	r.Close()
+
+	if err != nil {
+		t.Fatalf("ParseRawJSON: %v", err)
+	}
+	if stdout := readJobFile(t, jobDir, "stdout.txt"); stdout != "" {
+		t.Errorf("stdout.txt = %q, want empty string", stdout)
+	}
+	if !strings.Contains(string(stderrData), "warning: malformed JSON in raw.json: result:") {
+		t.Errorf("warning must name the result field, got: %q", stderrData)
+	}
+}
@@ -1,51 +1,176 @@
 package claude
 
 import (
+	"bytes"
 	"encoding/json"
+	"errors"
 	"fmt"
 	"os"
 	"path/filepath"
+	"strconv"
 	"strings"
+	"unicode/utf8"
 )
 
 // rawOutput is the top-level structure of the JSON emitted by claude --output-format json.
 type rawOutput struct {
-	Result   string        `json:"result"`
-	Messages []rawMessage  `json:"messages"`
+	rawResult
+	Messages []rawMessage `json:"messages"`
 }
 
+// rawResult is the part of rawOutput needed for stdout.txt.  It is decoded on
+// its own when the output contains no tool_use blocks.
+type rawResult struct {
+	Result json.RawMessage `json:"result"`
+}
+
+// toolUseMarker is the literal a tool_use block carries as its type when the
+// string is written without escapes.  unicodeEscape marks input where the type
+// might be spelt with \u escapes instead (e.g. "tool\u005fuse"), which the
+// marker scan cannot rule out.
+var (
+	toolUseMarker = []byte(`"tool_use"`)
+	unicodeEscape = []byte(`\u`)
+)
+
+// rawMessage holds only the content blocks of a message; the role is not
+// needed for the changelog, so it is left for the decoder to skip.
 type rawMessage struct {
-	Role    string       `json:"role"`
 	Content []rawContent `json:"content"`
 }
 
 type rawContent struct {
-	Type  string          `json:"type"`
-	Name  string          `json:"name"`
-	Input json.RawMessage `json:"input"`
+	Type  string    `json:"type"`
+	Name  toolKind  `json:"name"`
+	Input toolInput `json:"input"`
 }
 
-// editInput is the decoded shape of a Edit tool_use input.
-type editInput struct {
-	FilePath  string `json:"file_path"`
-	OldString string `json:"old_string"`
-	NewString string `json:"new_string"`
+// toolKind identifies a tool_use by name.  Only the tools that appear in the
+// changelog get their own value; every other tool decodes to toolOther.
+type toolKind uint8
+
+const (
+	toolOther toolKind = iota
+	toolEdit
+	toolWrite
+	toolBash
+	toolNotebookEdit
+)
+
+// toolKinds maps tool_use names to their toolKind.
+var toolKinds = map[string]toolKind{
+	"Edit":         toolEdit,
+	"Write":        toolWrite,
+	"Bash":         toolBash,
+	"NotebookEdit": toolNotebookEdit,
 }
 
-// writeInput is the decoded shape of a Write tool_use input.
-type writeInput struct {
-	FilePath string `json:"file_path"`
-	Content  string `json:"content"`
+// UnmarshalJSON implements json.Unmarshaler.  Plain names are looked up
+// directly from the raw token, so no string is allocated per block.  A name
+// that is not a string decodes to toolOther rather than failing the document.
+func (k *toolKind) UnmarshalJSON(data []byte) error {
+	if name, ok := plainString(data); ok {
+		*k = toolKinds[string(name)]
+		return nil
+	}
+	var name string
+	if err := json.Unmarshal(data, &name); err != nil {
+		*k = toolOther
+		return nil
+	}
+	*k = toolKinds[name]
+	return nil
 }
 
-// bashInput is the decoded shape of a Bash tool_use input.
-type bashInput struct {
-	Command string `json:"command"`
+// toolInput is the union of the tool_use input fields the changelog needs.
+// Decoding it alongside the rest of the document avoids a second
+// json.Unmarshal per tool_use block; unused fields stay empty.  Bulky
+// payloads are never materialised: new_string is decoded only to its length,
+// and old_string and Write content are only type-checked.
+//
+// The fields are filled in by the same decoder pass as the rest of the
+// document and never fail it: a value of the wrong type only marks its field.
+// An input that is not an object is a type mismatch the caller tolerates; it
+// leaves every field unset, so appendChange skips the block because the
+// tool's path or command was not decoded.
+type toolInput struct {
+	FilePath     stringField `json:"file_path"`     // Edit, Write
+	OldString    stringCheck `json:"old_string"`    // Edit
+	NewString    stringLen   `json:"new_string"`    // Edit
+	Content      stringCheck `json:"content"`       // Write
+	Command      stringField `json:"command"`       // Bash
+	NotebookPath stringField `json:"notebook_path"` // NotebookEdit
+}
+
+// stringField is a string-valued tool input field.  Valid reports that the
+// field was present with a string (or null) value; a value of any other type
+// leaves it false instead of failing the enclosing decode.
+type stringField struct {
+	Value string
+	Valid bool
+}
+
+// UnmarshalJSON implements json.Unmarshaler.
+func (f *stringField) UnmarshalJSON(data []byte) error {
+	if s, ok := plainString(data); ok {
+		f.Value, f.Valid = string(s), true
+		return nil
+	}
+	if err := json.Unmarshal(data, &f.Value); err != nil {
+		f.Value, f.Valid = "", false
+		return nil
+	}
+	f.Valid = true
+	return nil
 }
 
-// notebookInput is the decoded shape of a NotebookEdit tool_use input.
-type notebookInput struct {
-	NotebookPath string `json:"notebook_path"`
+// plainString returns the contents of a JSON string token that needs no
+// decoding: no escapes, and valid UTF-8 (which encoding/json would otherwise
+// rewrite).  ok is false for any other token.
+func plainString(data []byte) (s []byte, ok bool) {
+	if len(data) >= 2 && data[0] == '"' && bytes.IndexByte(data, '\\') < 0 && utf8.Valid(data) {
+		return data[1 : len(data)-1], true
+	}
+	return nil, false
+}
+
+// stringLen is a string-valued tool input field decoded only to its length in
+// bytes, without materialising the string itself.  A value of any other type
+// sets Bad instead of failing the enclosing decode.
+type stringLen struct {
+	Len int
+	Bad bool
+}
+
+// UnmarshalJSON implements json.Unmarshaler.  Plain strings are measured
+// straight from the raw token; anything else goes through the regular string
+// decoder so Len always matches len(decodedString).
+func (n *stringLen) UnmarshalJSON(data []byte) error {
+	if s, ok := plainString(data); ok {
+		n.Len = len(s)
+		return nil
+	}
+	var s string
+	if err := json.Unmarshal(data, &s); err != nil {
+		n.Len, n.Bad = 0, true
+		return nil
+	}
+	n.Len = len(s)
+	return nil
+}
+
+// stringCheck is a string-valued tool input field whose value is never used.
+// It only records whether the value had the wrong type, leaving the string
+// itself undecoded.
+type stringCheck struct {
+	Bad bool
+}
+
+// UnmarshalJSON implements json.Unmarshaler.  The token has already been
+// validated by the decoder, so a leading quote means a well-formed string.
+func (c *stringCheck) UnmarshalJSON(data []byte) error {
+	c.Bad = len(data) == 0 || (data[0] != '"' && string(data) != "null")
+	return nil
 }
 
 // ParseRawJSON reads raw.json from jobDir, extracts the ".result" field into
@@ -53,6 +178,8 @@ type notebookInput struct {
 //
 // Errors (malformed JSON, missing fields) are handled gracefully: stdout.txt
 // and changelog.txt are always written; a warning is logged to stderr.
+// Message fields of the wrong type (e.g. "messages": "oops") are not treated
+// as malformed: they contribute no changelog entries and stdout.txt is kept.
 func ParseRawJSON(jobDir string) error {
 	rawPath := filepath.Join(jobDir, "raw.json")
 	data, err := os.ReadFile(rawPath)
@@ -60,8 +187,31 @@ func ParseRawJSON(jobDir string) error {
 		return fmt.Errorf("read raw.json: %w", err)
 	}
 
+	// Transcripts without a single tool_use block (plain answers) have nothing
+	// for the changelog, so a quick byte scan lets them skip decoding messages.
+	// Any \u escape forces the full decode, since an escaped type string would
+	// not match the marker.
 	var out rawOutput
-	if jsonErr := json.Unmarshal(data, &out); jsonErr != nil {
+	var target any = &out
+	if !bytes.Contains(data, toolUseMarker) && !bytes.Contains(data, unicodeEscape) {
+		target = &out.rawResult
+	}
+
+	var result []byte
+	jsonErr := json.Unmarshal(data, target)
+	// On a type mismatch inside a field the decoder skips only the offending
+	// value and still fills in the rest, so it is not fatal.  This keeps the
+	// outcome the same whether or not the scan above skipped decoding the
+	// messages.  A top-level value that is not an object (Field == "") is
+	// still malformed.
+	var typeErr *json.UnmarshalTypeError
+	if errors.As(jsonErr, &typeErr) && typeErr.Field != "" {
+		jsonErr = nil
+	}
+	if jsonErr == nil {
+		result, jsonErr = decodeResult(out.Result)
+	}
+	if jsonErr != nil {
 		// Malformed JSON — warn and write empty files.
 		fmt.Fprintf(os.Stderr, "warning: malformed JSON in raw.json: %v\n", jsonErr)
 		if writeErr := os.WriteFile(filepath.Join(jobDir, "stdout.txt"), []byte(""), 0o644); writeErr != nil {
@@ -71,77 +221,113 @@ func ParseRawJSON(jobDir string) error {
 	}
 
 	// Write stdout.txt from .result.
-	if err := os.WriteFile(filepath.Join(jobDir, "stdout.txt"), []byte(out.Result), 0o644); err != nil {
+	if err := os.WriteFile(filepath.Join(jobDir, "stdout.txt"), result, 0o644); err != nil {
 		return fmt.Errorf("write stdout.txt: %w", err)
 	}
 
-	// Collect tool_use entries from all messages.
-	var toolUses []rawContent
-	for _, msg := range out.Messages {
-		for _, c := range msg.Content {
-			if c.Type == "tool_use" {
-				toolUses = append(toolUses, c)
-			}
-		}
-	}
+	return GenerateChangelog(jobDir, out.Messages)
+}
 
-	return GenerateChangelog(jobDir, toolUses)
+// decodeResult returns the text of the raw ".result" token.  A missing or null
+// result yields no text.  Strings without escapes (and valid UTF-8, which
+// encoding/json would otherwise rewrite) are returned as a sub-slice of the
+// token, skipping the decode into a string and the copy back to bytes.
+func decodeResult(raw json.RawMessage) ([]byte, error) {
+	if s, ok := plainString(raw); ok {
+		return s, nil
+	}
+	if len(raw) == 0 {
+		return nil, nil
+	}
+	var s string
+	if err := json.Unmarshal(raw, &s); err != nil {
+		return nil, fmt.Errorf("result: %w", err)
+	}
+	return []byte(s), nil
 }
 
-// GenerateChangelog synthesises changelog.txt from a slice of tool_use content
-// blocks.  When toolUses is empty or nil it writes "(no file changes)".
-func GenerateChangelog(jobDir string, toolUses []rawContent) error {
-	var lines []string
+// GenerateChangelog synthesises changelog.txt from the tool_use content blocks
+// found in messages.  When there are none (or messages is nil) it writes
+// "(no file changes)".
+//
+// Blocks are visited in place rather than first being copied into a separate
+// tool_use slice, and lines are appended straight into the byte buffer that is
+// written to disk, so no per-line strings or joined copy are allocated.
+func GenerateChangelog(jobDir string, messages []rawMessage) error {
+	var buf []byte
 
-	for _, tu := range toolUses {
-		switch tu.Name {
-		case "Edit":
-			var inp editInput
-			if err := json.Unmarshal(tu.Input, &inp); err != nil {
+	for i := range messages {
+		content := messages[i].Content
+		for j := range content {
+			tu := &content[j]
+			if tu.Type != "tool_use" {
 				continue
 			}
-			charCount := len(inp.NewString)
-			lines = append(lines, fmt.Sprintf("EDIT %s: %d chars", inp.FilePath, charCount))
+			buf = appendChange(buf, tu)
+		}
+	}
 
-		case "Write":
-			var inp writeInput
-			if err := json.Unmarshal(tu.Input, &inp); err != nil {
-				continue
-			}
-			lines = append(lines, fmt.Sprintf("WRITE %s", inp.FilePath))
+	if len(buf) == 0 {
+		buf = []byte("(no file changes)")
+	}
 
-		case "Bash":
-			var inp bashInput
-			if err := json.Unmarshal(tu.Input, &inp); err != nil {
-				continue
-			}
-			cmd := inp.Command
-			if len(cmd) > 80 {
-				cmd = cmd[:80]
-			}
-			if isDeleteCommand(cmd) {
-				lines = append(lines, fmt.Sprintf("DELETE via bash: %s", cmd))
-			} else if !isCompoundCommand(cmd) {
-				lines = append(lines, fmt.Sprintf("FS: %s", cmd))
-			}
+	return os.WriteFile(filepath.Join(jobDir, "changelog.txt"), buf, 0o644)
+}
 
-		case "NotebookEdit":
-			var inp notebookInput
-			if err := json.Unmarshal(tu.Input, &inp); err != nil {
-				continue
-			}
-			lines = append(lines, fmt.Sprintf("NOTEBOOK %s", inp.NotebookPath))
+// appendChange appends the changelog line for a single tool_use block to buf,
+// if the tool is one that modifies files.  Lines are newline-separated.
+// Blocks whose path or command is missing (including inputs that are not
+// objects), or whose fields for that tool have the wrong type, are skipped.
+func appendChange(buf []byte, tu *rawContent) []byte {
+	inp := &tu.Input
+	switch tu.Name {
+	case toolEdit:
+		if !inp.FilePath.Valid || inp.OldString.Bad || inp.NewString.Bad {
+			break
+		}
+		buf = appendLine(buf, "EDIT ", inp.FilePath.Value)
+		buf = append(buf, ": "...)
+		buf = strconv.AppendInt(buf, int64(inp.NewString.Len), 10)
+		buf = append(buf, " chars"...)
+
+	case toolWrite:
+		if !inp.FilePath.Valid || inp.Content.Bad {
+			break
+		}
+		buf = appendLine(buf, "WRITE ", inp.FilePath.Value)
+
+	case toolBash:
+		if !inp.Command.Valid {
+			break
+		}
+		// Truncate before classifying: re-slicing a string does not copy, and
+		// it bounds the scans below to the 80 bytes that are reported.
+		cmd := inp.Command.Value
+		if len(cmd) > 80 {
+			cmd = cmd[:80]
+		}
+		if isDeleteCommand(cmd) {
+			buf = appendLine(buf, "DELETE via bash: ", cmd)
+		} else if !isCompoundCommand(cmd) {
+			buf = appendLine(buf, "FS: ", cmd)
 		}
-	}
 
-	var content string
-	if len(lines) == 0 {
-		content = "(no file changes)"
-	} else {
-		content = strings.Join(lines, "\n")
+	case toolNotebookEdit:
+		if !inp.NotebookPath.Valid {
+			break
+		}
+		buf = appendLine(buf, "NOTEBOOK ", inp.NotebookPath.Value)
 	}
+	return buf
+}
 
-	return os.WriteFile(filepath.Join(jobDir, "changelog.txt"), []byte(content), 0o644)
+// appendLine starts a new changelog line in buf containing prefix+value.
+func appendLine(buf []byte, prefix, value string) []byte {
+	if len(buf) > 0 {
+		buf = append(buf, '\n')
+	}
+	buf = append(buf, prefix...)
+	return append(buf, value...)
 }
 
 // isDeleteCommand reports whether a bash command is a delete/remove operation.
@@ -153,9 +339,18 @@ func isDeleteCommand(cmd string) bool {
 // isCompoundCommand reports whether a bash command is a compound shell expression
 // (joined by &&, ||, ;, or a pipe |).  Compound commands like "cd /foo && go vet ./..."
 // are read-only orchestration and are excluded from the FS changelog.
+//
+// The command is scanned once; "||" needs no special case since any '|' matches.
 func isCompoundCommand(cmd string) bool {
-	return strings.Contains(cmd, "&&") ||
-		strings.Contains(cmd, "||") ||
-		strings.Contains(cmd, ";") ||
-		strings.Contains(cmd, "|")
+	for i := 0; i < len(cmd); i++ {
+		switch cmd[i] {
+		case ';', '|':
+			return true
+		case '&':
+			if i+1 < len(cmd) && cmd[i+1] == '&' {
+				return true
+			}
+		}
+	}
+	return false
 }